@@ -1,5 +1,4 @@
 import streamlit as st
-import asyncio
 import logging
 import sys
 import os
@@ -15,10 +14,10 @@ sys.path.insert(0, current_dir)
 
 # Try to import multi_agent module
 try:
-    from multi_agent import run_multi_agent
+    from multi_agent import stream_multi_agent, run_coroutine, iterate_async
     MULTI_AGENT_AVAILABLE = True
     print("✅ Successfully imported multi_agent module")
-except ImportError as e:
+except (ImportError, RuntimeError) as e:  # RuntimeError: missing Azure OpenAI settings
     MULTI_AGENT_AVAILABLE = False
     print(f"❌ Failed to import multi_agent: {e}")
     tb_module.print_exc()
@@ -475,8 +474,12 @@ def main():
                             
                             st.write("🔍 **Starting approval process...**")
                             
-                            html_code, result_message = asyncio.run(
-                                handle_approval(st.session_state.approval_data, approval_text.strip())
+                            html_code, result_message = run_coroutine(
+                                handle_approval(
+                                    st.session_state.approval_data,
+                                    approval_text.strip(),
+                                    views=st.session_state.get("approval_views"),
+                                )
                             )
                             
                             st.write("🔍 **Approval process completed:**")
@@ -735,6 +738,10 @@ def main():
         delattr(st.session_state, 'pending_request')  # Remove the pending request
         
         try:
+            # Agent messages are rendered here as they arrive; the rerun below replaces
+            # them with the regular chat history
+            chat_container = st.container()
+
             # Show processing status
             with st.spinner("🤖 Agents collaborating..."):
                 progress_placeholder = st.empty()
@@ -743,9 +750,18 @@ def main():
                 # Initialize session state for progress tracking
                 st.session_state.current_message_count = 0
                 
-                # Run multi-agent system
+                # Run multi-agent system, showing each agent message as it arrives
                 try:
-                    result = asyncio.run(run_multi_agent(user_request, streamlit_mode=True))
+                    result = None
+                    for event in iterate_async(stream_multi_agent(user_request, streamlit_mode=True)):
+                        if event["type"] == "result":
+                            result = event["result"]
+                        elif event["role"].lower() != "user":
+                            chat_container.chat_message(event["role"]).write(event["content"])
+                            st.session_state.current_message_count += 1
+                            progress_placeholder.info(
+                                f"💬 {event['role']} replied ({st.session_state.current_message_count} messages so far)..."
+                            )
                     
                     # Handle different result statuses
                     if isinstance(result, dict):
@@ -765,6 +781,7 @@ def main():
                             # Set approval state
                             st.session_state.awaiting_approval = True
                             st.session_state.approval_data = result["chat_history"]
+                            st.session_state.approval_views = result.get("chat_views")
                             st.session_state.should_auto_scroll = True  # Trigger auto-scroll
                             
                         elif status == "safety_limit_reached":
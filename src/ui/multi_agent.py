@@ -20,33 +20,109 @@ import sys
 import os
 import re
 import asyncio
+import atexit
+import contextlib
+import functools
+import hashlib
+import importlib.util
+import itertools
+import logging
 import subprocess
+import threading
+import time
 import traceback
+import uuid
+import weakref
 from pathlib import Path
-from typing import List
+from collections import defaultdict
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 import warnings
 import shutil
 
-from semantic_kernel.agents import Agent, AgentGroupChat, ChatCompletionAgent
+from semantic_kernel.agents import Agent, AgentGroupChat, ChatCompletionAgent, ChatHistoryAgentThread
 from semantic_kernel.agents.strategies.termination.termination_strategy import TerminationStrategy
 from semantic_kernel.agents.strategies.selection.kernel_function_selection_strategy import (
     KernelFunctionSelectionStrategy,
 )
+from semantic_kernel.agents.strategies.selection.selection_strategy import SelectionStrategy
+from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.open_ai_prompt_execution_settings import (
+    OpenAIChatPromptExecutionSettings,
+)
+from semantic_kernel.connectors.ai.open_ai.const import DEFAULT_AZURE_API_VERSION
 from semantic_kernel.connectors.ai.open_ai.services.azure_chat_completion import AzureChatCompletion
 from semantic_kernel.contents.chat_message_content import ChatMessageContent
 from semantic_kernel.contents.utils.author_role import AuthorRole
+from semantic_kernel.contents.history_reducer.chat_history_reducer import ChatHistoryReducer
+from semantic_kernel.contents.history_reducer.chat_history_summarization_reducer import (
+    ChatHistorySummarizationReducer,
+)
+from semantic_kernel.contents.history_reducer.chat_history_truncation_reducer import ChatHistoryTruncationReducer
 from semantic_kernel.kernel import Kernel
 from semantic_kernel.functions.kernel_function_from_prompt import KernelFunctionFromPrompt
 from semantic_kernel.functions.kernel_arguments import KernelArguments
+import httpx
+from openai import AsyncAzureOpenAI, DefaultAsyncHttpxClient
+from openai.types.chat import ChatCompletion
+from pydantic import PrivateAttr
+
+# orjson is optional; fall back to the standard library encoder
+try:
+    import orjson as _json
+
+    def _json_dumps(obj) -> str:
+        return _json.dumps(obj).decode("utf-8")
+except ImportError:
+    import json as _json
+
+    _json_dumps = _json.dumps
+
+# pygit2 is optional; without it git is queried through subprocesses
+try:
+    import pygit2
+except ImportError:
+    pygit2 = None
 
 # Load environment variables from .env file
 load_dotenv()
 
-# DEV TOGGLE - Set to False to suppress Git diagnostic messages
-DEV_MODE = True
+# DEV TOGGLE - Set DEV_MODE=0 to suppress Git diagnostic messages
+DEV_MODE = os.getenv("DEV_MODE", "1") == "1"
+logger = logging.getLogger("multi_agent")
+logger.setLevel(logging.DEBUG if DEV_MODE else logging.INFO)
 # ROOT_TOGGLE = True means output to project root, False means UI folder
 ROOT_TOGGLE = True
+# MA_VERBOSE=1 echoes the full agent transcript to stdout in Streamlit mode too
+VERBOSE = os.getenv("MA_VERBOSE") == "1"
+# HISTORY_POLICY controls what the agents see: "full" (default), "latest" or "window_summary"
+HISTORY_POLICY = os.getenv("HISTORY_POLICY", "full")
+_HISTORY_POLICIES = ("full", "latest", "window_summary")
+if HISTORY_POLICY not in _HISTORY_POLICIES:
+    raise RuntimeError(f"Unknown HISTORY_POLICY '{HISTORY_POLICY}' (expected one of: {', '.join(_HISTORY_POLICIES)})")
+_HISTORY_KEEP = 6  # messages kept verbatim
+_HISTORY_THRESHOLD = 4  # extra messages tolerated, i.e. reduce once history exceeds 10
+# USE_BATCH_API=1 routes Streamlit-mode agent turns through the Azure OpenAI Batch API
+USE_BATCH_API = os.getenv("USE_BATCH_API") == "1"
+_BATCH_POLL_INITIAL_DELAY = 2.0
+_BATCH_POLL_MAX_DELAY = 60.0
+_BATCH_SERVICE_ID = "batch"  # kernel service id the agents are bound to in batch mode
+# STRICT_MODE=1 sends every turn through the LLM selection prompt instead of the rule-based shortcut
+STRICT_MODE = os.getenv("STRICT_MODE") == "1"
+
+# Azure OpenAI settings - read once at import so missing config fails at startup
+_REQUIRED_AZURE_VARS = ("AZURE_OPENAI_CHAT_DEPLOYMENT_NAME", "AZURE_OPENAI_ENDPOINT", "AZURE_OPENAI_API_KEY")
+_missing_azure_vars = [var for var in _REQUIRED_AZURE_VARS if not os.getenv(var)]
+if _missing_azure_vars:
+    raise RuntimeError(
+        f"Missing Azure OpenAI configuration: {', '.join(_missing_azure_vars)} "
+        "(set them in .env or the environment)"
+    )
+_AZ_DEPLOY = os.environ["AZURE_OPENAI_CHAT_DEPLOYMENT_NAME"]
+_AZ_ENDPOINT = os.environ["AZURE_OPENAI_ENDPOINT"]
+_AZ_API_KEY = os.environ["AZURE_OPENAI_API_KEY"]
+_AZ_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION")
+_AZ_SUMMARY_DEPLOY = os.getenv("AZURE_OPENAI_SUMMARY_DEPLOYMENT_NAME")
+GITHUB_REPO_URL = os.getenv("GITHUB_REPO_URL", "")
 
 # Paths to possible script locations
 def find_git_root(path: Path) -> Path:
@@ -74,6 +150,13 @@ PUSH_SCRIPT = find_push_script()
 
 # Fenced block HTML extraction pattern
 _HTML_RE = re.compile(r"```html(.*?)```", re.DOTALL | re.IGNORECASE)
+# ProductOwner sign-off phrase; case-insensitive search avoids an upper() copy per message
+_APPROVAL_RE = re.compile(r"READY FOR USER APPROVAL", re.IGNORECASE)
+_REQUIREMENTS_DONE_RE = re.compile(r"requirements are clear|ready for development", re.IGNORECASE)
+# Selection result parsing: one scan over the upper-cased reply
+_AGENT_NAMES = frozenset(("BusinessAnalyst", "SoftwareEngineer", "ProductOwner"))
+_AGENT_RE = re.compile(r"SOFTWAREENGINEER|ENGINEER|PRODUCTOWNER")
+_AGENT_MAP = {"SOFTWAREENGINEER": "SoftwareEngineer", "ENGINEER": "SoftwareEngineer", "PRODUCTOWNER": "ProductOwner"}
 
 # Output file destination - save in current directory but consider project structurce
 if ROOT_TOGGLE:
@@ -83,16 +166,77 @@ else:
 
 # --- Helper function to extract HTML ---
 def _extract_html(text: str) -> str:
-    match = _HTML_RE.search(text)
-    if match:
-        return match.group(1).strip()
+    # Fast path: the usual lowercase fence found with plain str.find
+    start = text.find("```html")
+    if start != -1:
+        start += len("```html")
+        end = text.find("```", start)
+        if end != -1:
+            return text[start:end].strip()
+    elif "```" in text:
+        # Rare case: fence with different casing (```HTML, ```Html) - anchor the regex there
+        start = text.lower().find("```html")
+        if start != -1:
+            match = _HTML_RE.match(text, start)
+            if match:
+                return match.group(1).strip()
     # fallback: if not in code block, return everything
     return text.strip()
 
+def _latest_engineer_html(outputs: List[str]):
+    """Return the newest valid HTML block among SoftwareEngineer replies, or None."""
+    for text in reversed(outputs):
+        if "```" not in text:  # no fenced block - skip the extraction entirely
+            continue
+        extracted_html = _extract_html(text)
+        if extracted_html and len(extracted_html) > 50:
+            return extracted_html
+    return None
+
+# --- Helper to buffer an async iterator ---
+_BUFFER_DONE = object()
+
+async def buffered(source):
+    """Yield items from `source`, fetching the next one while the consumer works.
+
+    A background task keeps pulling from `source` while the consumer processes
+    earlier items, overlapping the producer's I/O with consumer-side work.
+    The producer starts on the next item only once the consumer has taken the
+    previous one, so an early stop discards at most one in-flight item.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            # aclosing: a cancel while waiting on the consumer still closes `source`
+            async with contextlib.aclosing(source):
+                async for item in source:
+                    await queue.put(item)
+                    await queue.join()
+            await queue.put(_BUFFER_DONE)
+        except Exception as e:
+            await queue.put(e)
+
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            item = await queue.get()
+            queue.task_done()
+            if item is _BUFFER_DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Wait for the pump to unwind so `source` is closed before we return
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
 # --- Helper function to generate GitHub file URL ---
 def generate_github_file_url(filename="index.html", branch="main"):
     """Generate GitHub URL for viewing a file based on the GITHUB_REPO_URL in .env"""
-    github_repo_url = os.getenv("GITHUB_REPO_URL", "")
+    github_repo_url = GITHUB_REPO_URL
     
     if not github_repo_url:
         return None
@@ -115,7 +259,7 @@ def generate_github_file_url(filename="index.html", branch="main"):
 
 def generate_github_pages_url(filename="index.html", branch="main"):
     """Generate GitHub Pages URL for live web app viewing"""
-    github_repo_url = os.getenv("GITHUB_REPO_URL", "")
+    github_repo_url = GITHUB_REPO_URL
     
     if not github_repo_url:
         return None
@@ -142,7 +286,6 @@ def generate_github_pages_url(filename="index.html", branch="main"):
             repo_name = parts[1]
             
             # Generate GitHub Pages URL with cache-busting
-            import time
             cache_buster = int(time.time())  # Current timestamp
             pages_url = f"https://{username}.github.io/{repo_name}/{filename}?v={cache_buster}"
             return pages_url
@@ -153,7 +296,7 @@ def generate_github_pages_url(filename="index.html", branch="main"):
 
 def generate_github_raw_url(filename="index.html", branch="main"):
     """Generate GitHub raw file URL for direct file access"""
-    github_repo_url = os.getenv("GITHUB_REPO_URL", "")
+    github_repo_url = GITHUB_REPO_URL
     
     if not github_repo_url:
         return None
@@ -171,8 +314,101 @@ def generate_github_raw_url(filename="index.html", branch="main"):
     raw_url = f"{web_url}/raw/{branch}/{filename}"
     return raw_url
 
+async def generate_github_urls(filename="index.html", branch="main"):
+    """Generate the Pages, file and raw GitHub URLs concurrently.
+
+    Each generator runs in a worker thread so any future URL validation
+    (e.g. HTTP HEAD checks) won't block the event loop or each other.
+    """
+    return await asyncio.gather(
+        asyncio.to_thread(generate_github_pages_url, filename, branch),
+        asyncio.to_thread(generate_github_file_url, filename, branch),
+        asyncio.to_thread(generate_github_raw_url, filename, branch),
+    )
+
 # --- Git Diagnostic Function ---
-def diagnose_git_setup():
+# Read-only commands shown by diagnose_git_setup; immutable so calls can share it
+_DIAG_COMMANDS = (
+    (("git", "status", "--porcelain"), "Git Status (short)"),
+    (("git", "remote", "-v"), "Git Remotes"),
+    (("git", "branch", "--show-current"), "Current Branch"),
+    (("git", "log", "--oneline", "-3"), "Recent Commits"),
+)
+
+@functools.lru_cache(maxsize=1)
+def _open_repository():
+    """Open PROJECT_ROOT with pygit2 once, or return None if unavailable."""
+    if pygit2 is None:
+        return None
+    try:
+        return pygit2.Repository(str(PROJECT_ROOT))
+    except pygit2.GitError:
+        return None
+
+def _porcelain_code(flags: int) -> str:
+    """Map pygit2 status flags to the two-letter `git status --porcelain` code."""
+    if flags & pygit2.GIT_STATUS_WT_NEW:
+        return "??"
+    index = " "
+    for flag, code in ((pygit2.GIT_STATUS_INDEX_NEW, "A"), (pygit2.GIT_STATUS_INDEX_MODIFIED, "M"),
+                       (pygit2.GIT_STATUS_INDEX_DELETED, "D"), (pygit2.GIT_STATUS_INDEX_RENAMED, "R"),
+                       (pygit2.GIT_STATUS_INDEX_TYPECHANGE, "T")):
+        if flags & flag:
+            index = code
+            break
+    worktree = " "
+    for flag, code in ((pygit2.GIT_STATUS_WT_MODIFIED, "M"), (pygit2.GIT_STATUS_WT_DELETED, "D"),
+                       (pygit2.GIT_STATUS_WT_RENAMED, "R"), (pygit2.GIT_STATUS_WT_TYPECHANGE, "T")):
+        if flags & flag:
+            worktree = code
+            break
+    return index + worktree
+
+def _pygit2_diagnostics(repo):
+    """Return (description, output) pairs matching _DIAG_COMMANDS, read in-process."""
+    status = "\n".join(
+        f"{_porcelain_code(flags)} {path}"
+        for path, flags in sorted(repo.status().items())
+        if not flags & pygit2.GIT_STATUS_IGNORED
+    )
+    remotes = "\n".join(
+        f"{remote.name}\t{url} ({kind})"
+        for remote in repo.remotes
+        for url, kind in ((remote.url, "fetch"), (remote.push_url or remote.url, "push"))
+    )
+    branch = "" if repo.head_is_unborn or repo.head_is_detached else repo.head.shorthand
+    commits = ""
+    if not repo.head_is_unborn:
+        commits = "\n".join(
+            f"{commit.short_id} {commit.message.splitlines()[0] if commit.message else ''}"
+            for commit in itertools.islice(repo.walk(repo.head.target, pygit2.GIT_SORT_TIME), 3)
+        )
+    return [
+        ("Git Status (short)", status),
+        ("Git Remotes", remotes),
+        ("Current Branch", branch),
+        ("Recent Commits", commits),
+    ]
+
+async def _run_git(cmd, timeout=None) -> subprocess.CompletedProcess:
+    """Run a git command under PROJECT_ROOT without blocking the event loop."""
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=str(PROJECT_ROOT),
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return subprocess.CompletedProcess(
+        cmd, proc.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+    )
+
+async def diagnose_git_setup():
     """Diagnose Git setup and repository status."""
     if not DEV_MODE:
         return
@@ -193,44 +429,35 @@ def diagnose_git_setup():
         print(f"📄 index.html at output path ({HTML_OUTPUT_FILE}): {HTML_OUTPUT_FILE.exists()}")
 
         # Only run git commands if we're in a git repo
-        if git_dir.exists():
-            # Git status
-            original_dir = os.getcwd()
-            os.chdir(PROJECT_ROOT)
-            
-            commands_to_run = [
-                (["git", "status", "--porcelain"], "Git Status (short)"),
-                (["git", "remote", "-v"], "Git Remotes"),
-                (["git", "branch", "--show-current"], "Current Branch"),
-                (["git", "log", "--oneline", "-3"], "Recent Commits"),
-            ]
-            
-            for cmd, description in commands_to_run:
+        repo = _open_repository() if git_dir.exists() else None
+        if repo is not None:
+            # Read everything in-process instead of starting a git process per query
+            for description, output in await asyncio.to_thread(_pygit2_diagnostics, repo):
                 print(f"\n🔍 {description}:")
-                try:
-                    result = subprocess.run(
-                        cmd,
-                        capture_output=True,
-                        text=True,
-                        cwd=str(PROJECT_ROOT),
-                        timeout=10
-                    )
-                    
-                    if result.returncode == 0:
-                        output = result.stdout.strip()
-                        if output:
-                            print(f"✅ {output}")
-                        else:
-                            print("✅ (no output - this might be normal)")
-                    else:
-                        print(f"❌ Error: {result.stderr}")
-                        
-                except subprocess.TimeoutExpired:
+                if output:
+                    print(f"✅ {output}")
+                else:
+                    print("✅ (no output - this might be normal)")
+        elif git_dir.exists():
+            # The commands are independent read-only queries, so run them all at once
+            results = await asyncio.gather(
+                *(_run_git(cmd, timeout=10) for cmd, _ in _DIAG_COMMANDS),
+                return_exceptions=True,
+            )
+            for (_, description), result in zip(_DIAG_COMMANDS, results):
+                print(f"\n🔍 {description}:")
+                if isinstance(result, asyncio.TimeoutError):
                     print("⏱️ Command timed out")
-                except Exception as e:
-                    print(f"❌ Exception: {e}")
-            
-            os.chdir(original_dir)
+                elif isinstance(result, Exception):
+                    print(f"❌ Exception: {result}")
+                elif result.returncode == 0:
+                    output = result.stdout.strip()
+                    if output:
+                        print(f"✅ {output}")
+                    else:
+                        print("✅ (no output - this might be normal)")
+                else:
+                    print(f"❌ Error: {result.stderr}")
         else:
             print("⚠️ Not in a Git repository - Git commands skipped")
         
@@ -239,32 +466,73 @@ def diagnose_git_setup():
     except Exception as e:
         print(f"❌ Diagnostic failed: {e}")
 
+# --- Batched Git Query ---
+async def git_bulk_info():
+    """Return branch, upstream and staged files using one `git status` call."""
+    result = await _run_git(("git", "status", "--porcelain=v2", "--branch"))
+    if result.returncode != 0:
+        print(f"❌ Could not read git status: {result.stderr}")
+        return None
+
+    info = {"branch": "", "upstream": "", "staged_files": []}
+    for line in result.stdout.splitlines():
+        if line.startswith("# branch.head "):
+            head = line[len("# branch.head "):]
+            info["branch"] = "" if head == "(detached)" else head
+        elif line.startswith("# branch.upstream "):
+            info["upstream"] = line[len("# branch.upstream "):]
+        elif line[:2] in ("1 ", "2 ") and line[2] != ".":
+            # Ordinary/renamed entry with a staged (index) change
+            fields = line.split(" ", 8 if line[0] == "1" else 9)
+            info["staged_files"].append(fields[-1].split("\t")[0])
+    return info
+
+# --- Chat History Views ---
+class ChatViews:
+    """Indexes over an append-only chat history, updated once per new message.
+
+    Saves rescanning the history every turn to find the latest
+    SoftwareEngineer message and whether the latest ProductOwner message approves.
+    """
+
+    def __init__(self):
+        self.last_se_idx = -1  # history index of the latest SoftwareEngineer message
+        self.po_contains_approval = False  # latest ProductOwner message approves
+        self._seen = 0
+
+    def update(self, history) -> "ChatViews":
+        """Index messages appended since the last call."""
+        total = len(history)
+        for idx in range(self._seen, total):
+            message = history[idx]
+            if message.name == "SoftwareEngineer":
+                self.last_se_idx = idx
+            elif message.name == "ProductOwner":
+                self.po_contains_approval = bool(message.content and _APPROVAL_RE.search(message.content))
+        self._seen = total
+        return self
+
 # --- Approval Termination Strategy ---
 class ApprovalTerminationStrategy(TerminationStrategy):
+    _views: ChatViews = PrivateAttr(default_factory=ChatViews)
+
+    @property
+    def views(self) -> ChatViews:
+        return self._views
+
     async def should_agent_terminate(self, agent: Agent, history: List[ChatMessageContent]) -> bool:
-        # Look at the last 5 messages for a ProductOwner approval
-        for message in reversed(history[-5:]):
-            # Simple check: ProductOwner approval
-            if (getattr(message, "name", None) == "ProductOwner" 
-                and message.content 
-                and "READY FOR USER APPROVAL" in message.content.strip().upper()):
-                return True
-        # Otherwise, keep going
-        return False
+        # Stop once the latest ProductOwner message approves
+        return self._views.update(history).po_contains_approval
 
 # --- Enhanced Agent Selection Strategy ---
-def create_agent_selection_strategy(kernel: Kernel) -> KernelFunctionSelectionStrategy:
-    """Create the agent selection strategy with improved logic."""
-    
-    selection_prompt = """
+# The static rules come before the history so consecutive selection prompts
+# share a stable prefix that the service can serve from its prompt cache.
+_SELECTION_PROMPT = """
 You are managing a web development workflow with three agents:
 - BusinessAnalyst: Gathers requirements (asks questions, waits for user responses)
 - SoftwareEngineer: Creates HTML/CSS/JS code based on requirements
 - ProductOwner: Reviews and approves/rejects the final code
 
-CONVERSATION HISTORY:
-{{$chat_history}}
-
 SELECTION RULES (follow strictly in order):
 1. If the last message is from User answering questions -> BusinessAnalyst should ask follow-up OR conclude with "Requirements are clear. Ready for development."
 2. If BusinessAnalyst indicated requirements gathering is complete (e.g., said something like "Requirements are clear", "Ready for development", or anything similar) -> SoftwareEngineer
@@ -278,42 +546,288 @@ IMPORTANT:
 - If BusinessAnalyst already asked a question and no user response, move to SoftwareEngineer
 - Look at the ACTUAL last speaker, not just the content
 
+CONVERSATION HISTORY:
+{{$chat_history}}
+
 Based on the conversation history above, who should speak next?
 Return ONLY one word: BusinessAnalyst, SoftwareEngineer, or ProductOwner
 """
 
-    selection_function = KernelFunctionFromPrompt(
+@functools.lru_cache(maxsize=1)
+def _selection_function() -> KernelFunctionFromPrompt:
+    """Build the selection prompt function once; its template is parsed on construction."""
+    return KernelFunctionFromPrompt(
         function_name="select_next_agent",
         description="Selects the next agent to participate in the conversation",
-        prompt=selection_prompt,
+        prompt=_SELECTION_PROMPT,
+        # The answer is a single agent name (at most a few tokens); keep it short and deterministic
+        prompt_execution_settings=OpenAIChatPromptExecutionSettings(max_tokens=4, temperature=0.0, top_p=1.0),
     )
 
+# --- Selection Prompt History Window ---
+class SelectionHistoryWindow:
+    """Append-only view of the chat history fed to the selection prompt.
+
+    The window grows from `min_size` to `max_size` messages and then restarts
+    from the latest `min_size`, so each selection prompt extends the previous
+    one instead of sliding by a message every turn (keeps the prompt prefix
+    cacheable on the service side).
+    """
+
+    def __init__(self, min_size: int = 8, max_size: int = 16):
+        self.min_size = min_size
+        self.max_size = max_size
+        self._window_start = 0  # history index of the first line in the window
+        self._seen = 0  # number of history messages already formatted
+        self._counted = 0  # number of history messages already counted
+        self._lines: List[str] = []
+        self.analyst_messages = 0  # BusinessAnalyst messages seen so far
+        self._fmt_cache: Dict[int, str] = {}  # id(message) -> formatted line; history messages are never mutated
+
+    def _format(self, msg: ChatMessageContent) -> str:
+        line = self._fmt_cache.get(id(msg))
+        if line is None:
+            speaker = "User" if msg.role == AuthorRole.USER else (msg.name or "Unknown")
+            line = f"{speaker}: {(msg.content or '')[:200]}..."  # Truncate long messages
+            self._fmt_cache[id(msg)] = line
+        return line
+
+    def update(self, history) -> None:
+        """Count BusinessAnalyst messages added since the last call."""
+        total = len(history)
+        for msg in history[self._counted:total]:
+            if msg.name == "BusinessAnalyst":
+                self.analyst_messages += 1
+        self._counted = total
+
+    def render(self, history) -> str:
+        """Format messages added since the last render and return the window text."""
+        self.update(history)
+        total = len(history)
+        if total - self._window_start > self.max_size:
+            # Window is full: restart from the latest messages and rebuild once
+            self._window_start = total - self.min_size
+            self._lines = [self._format(msg) for msg in history[self._window_start:]]
+        else:
+            self._lines.extend(self._format(msg) for msg in history[self._seen:total])
+        self._seen = total
+        return "\n".join(self._lines)
+
+# Selection decisions keyed by a digest of the rendered prompt input, shared across runs
+_SELECTION_CACHE: Dict[str, str] = {}
+_SELECTION_CACHE_SIZE = 512
+
+class WindowedSelectionStrategy(KernelFunctionSelectionStrategy):
+    """Selection strategy that renders its `chat_history` argument from the history it is given.
+
+    Building the prompt input at selection time, rather than in the consumer
+    loop, lets the chat producer run ahead of message post-processing.
+    Once the BusinessAnalyst has asked more than `max_ba_questions`, it is never
+    selected again and a BusinessAnalyst turn hands straight to the
+    SoftwareEngineer without a selection call.
+    """
+
+    max_ba_questions: int = 2
+
+    _window: SelectionHistoryWindow = PrivateAttr(default_factory=SelectionHistoryWindow)
+
+    async def select_agent(self, agents: List[Agent], history: List[ChatMessageContent]) -> Agent:
+        # Only count here; the prompt text is rendered once the LLM call is certain
+        self._window.update(history)
+        last_speaker = (history[-1].name or "User") if history else "User"
+        ba_exhausted = self._window.analyst_messages > self.max_ba_questions
+        if ba_exhausted and last_speaker == "BusinessAnalyst":
+            logger.debug("BusinessAnalyst question limit reached, skipping selection")
+            return self._agent_named(agents, "SoftwareEngineer")
+        context_info = f"\nContext: BusinessAnalyst has asked {self._window.analyst_messages} questions. Last speaker: {last_speaker}"
+        rendered = self._window.render(history) + context_info
+        self.arguments = KernelArguments(chat_history=rendered)
+        # Reuse an earlier decision when the rendered selection input is identical
+        key = hashlib.blake2b(rendered.encode(), digest_size=16).hexdigest()
+        name = _SELECTION_CACHE.get(key)
+        agent = next((agent for agent in agents if agent.name == name), None) if name is not None else None
+        if agent is not None:
+            logger.debug("🎯 Selection cache hit: %s", name)
+        else:
+            agent = await super().select_agent(agents, history)
+            if len(_SELECTION_CACHE) >= _SELECTION_CACHE_SIZE:
+                del _SELECTION_CACHE[next(iter(_SELECTION_CACHE))]  # evict the oldest entry
+            _SELECTION_CACHE[key] = agent.name
+        if ba_exhausted and agent.name == "BusinessAnalyst":
+            return self._agent_named(agents, "SoftwareEngineer")
+        return agent
+
+    @staticmethod
+    def _agent_named(agents: List[Agent], name: str) -> Agent:
+        return next(agent for agent in agents if agent.name == name)
+
+class DeterministicSelectionStrategy(SelectionStrategy):
+    """Pick the next agent with the selection rules evaluated in Python.
+
+    Only turns the rules cannot decide (e.g. a SoftwareEngineer reply with no
+    code, or a BusinessAnalyst message that does not close requirements) are
+    passed to `fallback`; without one, the BusinessAnalyst is chosen.
+    """
+
+    fallback: Optional[SelectionStrategy] = None
+
+    @staticmethod
+    def _rule_based_choice(history: List[ChatMessageContent]) -> Optional[str]:
+        if not history:
+            return "BusinessAnalyst"
+        last = history[-1]
+        content = last.content or ""
+        if last.role == AuthorRole.USER:
+            return "BusinessAnalyst"
+        if last.name == "SoftwareEngineer" and "```html" in content.lower():
+            return "ProductOwner"
+        if last.name == "ProductOwner" and not _APPROVAL_RE.search(content):
+            return "SoftwareEngineer"
+        if last.name == "BusinessAnalyst" and _REQUIREMENTS_DONE_RE.search(content):
+            return "SoftwareEngineer"
+        return None
+
+    async def select_agent(self, agents: List[Agent], history: List[ChatMessageContent]) -> Agent:
+        name = self._rule_based_choice(history)
+        if name is None:
+            if self.fallback is not None:
+                return await self.fallback.select_agent(agents, history)
+            name = "BusinessAnalyst"
+        return next(agent for agent in agents if agent.name == name)
+
+async def create_agent_selection_strategy(kernel: Kernel, max_ba_questions: int = 2) -> KernelFunctionSelectionStrategy:
+    """Create the agent selection strategy with improved logic."""
+    
     def parse_agent_selection(result) -> str:
         """Parse the selection result to return a valid agent name."""
-        result_str = str(result).strip().upper()
-        # Accept partial or fuzzy matches
-        if "SOFTWAREENGINEER" in result_str:
+        result_str = str(result).strip()
+        # Fast path: the model usually answers with the bare agent name
+        if result_str in _AGENT_NAMES:
+            return result_str
+        # Accept partial or fuzzy matches; SoftwareEngineer wins when both names appear
+        found = {_AGENT_MAP[token] for token in _AGENT_RE.findall(result_str.upper())}
+        if "SoftwareEngineer" in found:
             return "SoftwareEngineer"
-        if "ENGINEER" in result_str:
-                return "SoftwareEngineer"
-        if "PRODUCTOWNER" in result_str:
-            return "ProductOwner"
-        return "BusinessAnalyst"
+        return "ProductOwner" if "ProductOwner" in found else "BusinessAnalyst"
 
-    return KernelFunctionSelectionStrategy(
+    return WindowedSelectionStrategy(
         kernel=kernel,
-        function=selection_function,
+        function=_selection_function(),
         arguments=KernelArguments(chat_history=""),
         result_parser=parse_agent_selection,
+        max_ba_questions=max_ba_questions,
     )
 
-# --- Create Individual Agents ---
-def create_business_analyst(kernel: Kernel) -> ChatCompletionAgent:
-    """Create the Business Analyst agent."""
-    return ChatCompletionAgent(
-        kernel=kernel,
-        name="BusinessAnalyst",
-        instructions="""
+# --- Shared Chat Services ---
+# One service per (event loop, class, deployment): the AsyncAzureOpenAI client inside
+# keeps a connection pool that is bound to the loop it was first used on.
+_CHAT_SERVICES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+# All services on a loop share one HTTP connection pool (HTTP/2 when `h2` is installed)
+_HTTP_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _HTTP_CLIENTS.get(loop)
+    if client is None or client.is_closed:
+        # The SDK's client class keeps its timeout and redirect defaults
+        client = _HTTP_CLIENTS[loop] = DefaultAsyncHttpxClient(
+            http2=_HTTP2,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+        )
+    return client
+
+async def close_http_client():
+    """Close the running loop's shared HTTP client and drop the services built on it."""
+    loop = asyncio.get_running_loop()
+    _CHAT_SERVICES.pop(loop, None)
+    client = _HTTP_CLIENTS.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+def get_chat_service(service_cls=AzureChatCompletion, deployment_name=None, service_id=None):
+    """Return a cached chat completion service for the running event loop."""
+    deployment_name = deployment_name or _AZ_DEPLOY
+    services = _CHAT_SERVICES.setdefault(asyncio.get_running_loop(), {})
+    key = (service_cls, deployment_name, service_id)
+    service = services.get(key)
+    if service is None:
+        service = services[key] = service_cls(
+            deployment_name=deployment_name,
+            service_id=service_id,
+            async_client=AsyncAzureOpenAI(
+                azure_endpoint=_AZ_ENDPOINT,
+                api_key=_AZ_API_KEY,
+                api_version=_AZ_API_VERSION or DEFAULT_AZURE_API_VERSION,
+                http_client=get_http_client(),
+            ),
+        )
+    return service
+
+# --- Persistent Event Loop (Streamlit) ---
+def start_background_loop() -> asyncio.AbstractEventLoop:
+    """Start an event loop in a daemon thread.
+
+    Streamlit reruns would otherwise call asyncio.run() each time, creating a
+    fresh loop and discarding the cached chat service and its connections.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="multi-agent-loop", daemon=True).start()
+    atexit.register(stop_background_loop, loop)
+    return loop
+
+def stop_background_loop(loop: asyncio.AbstractEventLoop):
+    """Close the loop's shared HTTP client, then stop the loop."""
+    if loop.is_running():
+        asyncio.run_coroutine_threadsafe(close_http_client(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+
+@functools.lru_cache(maxsize=1)
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """Return the process-wide background loop, starting it on first use."""
+    return start_background_loop()
+
+def run_coroutine(coro, loop=None):
+    """Run `coro` on the background loop (or `loop`) and block until it finishes."""
+    return asyncio.run_coroutine_threadsafe(coro, loop or get_background_loop()).result()
+
+def iterate_async(agen, loop=None):
+    """Consume async generator `agen` on the background loop (or `loop`) from synchronous code."""
+    loop = loop or get_background_loop()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
+
+# --- Chat History Policy ---
+def create_history_reducer(service, policy: str = HISTORY_POLICY):
+    """Return the history reducer for `policy`, or None to send agents the full history.
+
+    - "latest": keep only the most recent messages.
+    - "window_summary": keep the most recent messages verbatim and fold everything
+      older into a single summary message.
+    """
+    if policy not in _HISTORY_POLICIES:
+        raise ValueError(f"Unknown history policy '{policy}' (expected one of: {', '.join(_HISTORY_POLICIES)})")
+    if policy == "latest":
+        return ChatHistoryTruncationReducer(target_count=_HISTORY_KEEP, threshold_count=_HISTORY_THRESHOLD)
+    if policy == "window_summary":
+        return ChatHistorySummarizationReducer(
+            service=service,
+            target_count=_HISTORY_KEEP,
+            threshold_count=_HISTORY_THRESHOLD,
+        )
+    return None
+
+# --- Agent Personas ---
+# Instruction templates rendered with str.format_map; missing placeholders become ""
+# so the rendered system prompts stay byte-identical across runs.
+_ANALYST_TMPL = """
 You are a Business Analyst. Upon receiving the user's initial request, immediately generate a detailed requirements document and project plan for the Software Engineer and Product Owner. 
 
 When documenting requirements, explicitly state ALL critical components, including those that might seem "obvious" (e.g., for a calculator: clearly specify "numeric keypad with buttons 0-9", for a form: "input fields for Name, Email, Phone", etc.).
@@ -321,14 +835,8 @@ If any requirement is unclear or missing, make reasonable assumptions and procee
 DO NOT ask the user questions or wait for any reply.
 Summarize the requirements and end your message with: "Requirements are clear. Ready for development."
 """
-    )
 
-def create_software_engineer(kernel: Kernel) -> ChatCompletionAgent:
-    """Create the Software Engineer agent."""
-    return ChatCompletionAgent(
-        kernel=kernel,
-        name="SoftwareEngineer",
-        instructions="""
+_ENGINEER_TMPL = """
 You are a Software Engineer. Your goal is to create a web app using HTML, CSS, and JavaScript based on the requirements provided by the Business Analyst.
 
 REQUIREMENTS:
@@ -366,14 +874,8 @@ Focus on creating something that actually works and looks professional.
 </html>
 ```
 """
-    )
 
-def create_product_owner(kernel: Kernel) -> ChatCompletionAgent:
-    """Create the Product Owner agent."""
-    return ChatCompletionAgent(
-        kernel=kernel,
-        name="ProductOwner",
-        instructions="""
+_OWNER_TMPL = """
 You are the Product Owner.
 When it is your turn, carefully review the latest code provided by the Software Engineer and compare it against the requirements from the Business Analyst and the original user request.
 
@@ -388,23 +890,132 @@ After several iterations with the Software Engineer, if certain requirements pro
 
 Do NOT include the READY FOR USER APPROVAL phrase in the message nor approve anything incomplete, missing, or not in the correct format. Do NOT give code, only review and make decisions.
 """
+
+def _render_persona(template: str, context=None) -> str:
+    """Fill a persona template from `context`, leaving unknown placeholders empty."""
+    return template.format_map(defaultdict(str, context or {}))
+
+# --- History-Reducing Agent ---
+class HistoryReducingAgent(ChatCompletionAgent):
+    """ChatCompletionAgent whose group-chat thread is backed by a ChatHistoryReducer.
+
+    The reducer becomes the history of the agent's channel thread and is
+    reduced before each turn, so the prompt only carries what the policy keeps.
+    The group chat's own history is left untouched.
+
+    AgentGroupChat keys channels by channel type, so every ChatCompletionAgent
+    in one chat shares the channel created by the first agent to speak. Give all
+    of them the same reducer instance.
+    """
+
+    _history_reducer: Optional[ChatHistoryReducer] = PrivateAttr(default=None)
+
+    def __init__(self, *, history_reducer: Optional[ChatHistoryReducer] = None, **kwargs):
+        super().__init__(**kwargs)
+        self._history_reducer = history_reducer
+
+    async def create_channel(self, chat_history=None, thread_id=None):
+        if chat_history is None and self._history_reducer is not None:
+            chat_history = self._history_reducer
+        return await super().create_channel(chat_history=chat_history, thread_id=thread_id)
+
+    async def invoke(self, messages=None, *, thread=None, **kwargs):
+        if isinstance(thread, ChatHistoryAgentThread) and thread.id is not None:
+            await thread.reduce()
+        async for response in super().invoke(messages, thread=thread, **kwargs):
+            yield response
+
+# --- Create Individual Agents ---
+async def create_business_analyst(kernel: Kernel, history_reducer=None, persona_context=None, arguments=None) -> ChatCompletionAgent:
+    """Create the Business Analyst agent."""
+    return HistoryReducingAgent(
+        kernel=kernel,
+        history_reducer=history_reducer,
+        arguments=arguments,
+        name="BusinessAnalyst",
+        instructions=_render_persona(_ANALYST_TMPL, persona_context),
     )
 
+async def create_software_engineer(kernel: Kernel, history_reducer=None, persona_context=None, arguments=None) -> ChatCompletionAgent:
+    """Create the Software Engineer agent."""
+    return HistoryReducingAgent(
+        kernel=kernel,
+        history_reducer=history_reducer,
+        arguments=arguments,
+        name="SoftwareEngineer",
+        instructions=_render_persona(_ENGINEER_TMPL, persona_context),
+    )
+
+async def create_product_owner(kernel: Kernel, history_reducer=None, persona_context=None, arguments=None) -> ChatCompletionAgent:
+    """Create the Product Owner agent."""
+    return HistoryReducingAgent(
+        kernel=kernel,
+        history_reducer=history_reducer,
+        arguments=arguments,
+        name="ProductOwner",
+        instructions=_render_persona(_OWNER_TMPL, persona_context),
+    )
+
+# --- Azure OpenAI Batch API Service ---
+class BatchAzureChatCompletion(AzureChatCompletion):
+    """AzureChatCompletion that submits each request as a one-line Azure OpenAI Batch job.
+
+    Batch jobs cost roughly half of real-time calls but finish asynchronously,
+    so this service is only used for non-interactive runs.
+    """
+
+    async def _inner_get_chat_message_contents(self, chat_history, settings):
+        if not isinstance(settings, OpenAIChatPromptExecutionSettings):
+            settings = self.get_prompt_execution_settings_from_settings(settings)
+        settings.stream = False
+        settings.messages = self._prepare_chat_history_for_request(chat_history)
+        settings.ai_model_id = settings.ai_model_id or self.ai_model_id
+
+        custom_id = uuid.uuid4().hex
+        request_line = _json_dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/chat/completions",
+            "body": settings.prepare_settings_dict(),
+        })
+        batch_file = await self.client.files.create(
+            file=(f"{custom_id}.jsonl", request_line.encode("utf-8")),
+            purpose="batch",
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/chat/completions",
+            completion_window="24h",
+        )
+        logger.debug("📦 Submitted batch %s for %s", batch.id, custom_id)
+
+        # Poll with exponential backoff until the batch reaches a terminal state
+        delay = _BATCH_POLL_INITIAL_DELAY
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _BATCH_POLL_MAX_DELAY)
+            batch = await self.client.batches.retrieve(batch.id)
+
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"Azure OpenAI batch {batch.id} ended with status '{batch.status}'")
+
+        output = await self.client.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            record = _json.loads(line)
+            if record.get("custom_id") == custom_id:
+                response = ChatCompletion.model_validate(record["response"]["body"])
+                break
+        else:
+            raise RuntimeError(f"Azure OpenAI batch {batch.id} returned no result for {custom_id}")
+
+        metadata = self._get_metadata_from_chat_response(response)
+        return [self._create_chat_message_content(response, choice, metadata) for choice in response.choices]
+
 # --- Enhanced Git Push Automation ---
 async def execute_git_push():
     """Execute Git push with improved error handling and output display."""
     try:
-        if DEV_MODE:
-            print(f"🔍 Current working directory: {os.getcwd()}")
-            print(f"🔍 Project root directory: {PROJECT_ROOT}")
-        
-        # Store original directory
-        original_dir = os.getcwd()
-        
-        # Ensure we're working from the project root
-        os.chdir(PROJECT_ROOT)
-        if DEV_MODE:
-            print(f"✅ Changed to project root: {os.getcwd()}")
+        logger.debug("🔍 Project root directory: %s", PROJECT_ROOT)
         
         # Check if we're in a git repository
         git_dir = PROJECT_ROOT / ".git"
@@ -412,157 +1023,76 @@ async def execute_git_push():
             print(f"ℹ️ Note: Not in a Git repository (normal in Azure deployment)")
             print(f"📄 HTML file will be saved to: {HTML_OUTPUT_FILE}")
             # In Azure deployment, we can't push to Git, but we can still save the file
-            os.chdir(original_dir)
             return True  # Return success since file saving is the primary goal
             
-        # Check if index.html exists in project root
-            OUTPUT_FILE = HTML_OUTPUT_FILE  # Use the toggle-selected file as your working output
-
-            if not OUTPUT_FILE.exists():
-                print(f"❌ Error: No HTML file found at {OUTPUT_FILE}")
-                os.chdir(original_dir)
-                return False
+        # Check the toggle-selected output file exists before running any git command
+        if not HTML_OUTPUT_FILE.exists():
+            print(f"❌ Error: No HTML file found at {HTML_OUTPUT_FILE}")
+            return False
         
         print("🚀 Executing Git operations...")
         
-        # Show current git status
-        if DEV_MODE:
-            print("📊 Current git status:")
-            result = subprocess.run(
-                ["git", "status", "--porcelain"],
-                capture_output=True,
-                text=True,
-                cwd=str(PROJECT_ROOT)
-            )
+        # Show current git status (debug only - skip the subprocess otherwise)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📊 Current git status:")
+            result = await _run_git(("git", "status", "--porcelain"))
             
             if result.returncode == 0:
                 if result.stdout.strip():
-                    print(f"Status output:\n{result.stdout}")
+                    logger.debug("Status output:\n%s", result.stdout)
                 else:
-                    print("✅ Working directory is clean")
+                    logger.debug("✅ Working directory is clean")
             else:
-                print(f"⚠️ Could not get git status: {result.stderr}")
+                logger.debug("⚠️ Could not get git status: %s", result.stderr)
         
         # Add the file
-        if DEV_MODE:
-            print("📝 Adding index.html to staging...")
-        result = subprocess.run(
-            ["git", "add", "index.html"],
-            capture_output=True,
-            text=True,
-            cwd=str(PROJECT_ROOT)
-        )
+        logger.debug("📝 Adding index.html to staging...")
+        result = await _run_git(("git", "add", "index.html"))
         
         if result.returncode != 0:
             print(f"❌ Git add failed: {result.stderr}")
-            os.chdir(original_dir)
             return False
-        else:
-            if DEV_MODE:
-                print("✅ Git add successful")
+        logger.debug("✅ Git add successful")
             
-        # Check if there are changes to commit
-        if DEV_MODE:
-            print("🔍 Checking for staged changes...")
-        result = subprocess.run(
-            ["git", "diff", "--staged", "--quiet"],
-            capture_output=True,
-            text=True,
-            cwd=str(PROJECT_ROOT)
-        )
-        
-        if result.returncode == 0:
+        # Read branch, upstream and staged files with a single git call;
+        # an empty staged list doubles as the "nothing to commit" check
+        logger.debug("🔍 Checking for staged changes...")
+        git_info = await git_bulk_info()
+        if git_info is None:
+            return False
+        if not git_info["staged_files"]:
             print("ℹ️ No changes to commit (file might already be up to date)")
-            os.chdir(original_dir)
             return True
-        
-        # Show what's staged
-        if DEV_MODE:
-            result = subprocess.run(
-                ["git", "diff", "--staged", "--name-only"],
-                capture_output=True,
-                text=True,
-                cwd=str(PROJECT_ROOT)
-            )
-            
-            if result.returncode == 0 and result.stdout.strip():
-                print(f"📄 Files staged for commit: {result.stdout.strip()}")
+        current_branch = git_info["branch"]
+        logger.debug("📄 Files staged for commit: %s", ", ".join(git_info["staged_files"]))
         
         # Create commit with timestamp
-        import datetime
-        timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        commit_message = f"Auto-deploy: Updated web app - {timestamp}"
+        commit_message = f"Auto-deploy: Updated web app - {time.strftime('%Y-%m-%d %H:%M:%S')}"
         
-        if DEV_MODE:
-            print("💾 Committing changes...")
-        result = subprocess.run(
-            ["git", "commit", "-m", commit_message],
-            capture_output=True,
-            text=True,
-            cwd=str(PROJECT_ROOT)
-        )
+        logger.debug("💾 Committing changes...")
+        result = await _run_git(("git", "commit", "-m", commit_message))
         
         if result.returncode != 0:
             print(f"❌ Git commit failed:")
             print(f"   stderr: {result.stderr}")
             print(f"   stdout: {result.stdout}")
-            os.chdir(original_dir)
             return False
-        else:
-            if DEV_MODE:
-                print("✅ Git commit successful")
-                if result.stdout.strip():
-                    print(f"   Commit output: {result.stdout}")
-            
-        # Get current branch
-        if DEV_MODE:
-            print("🔍 Getting current branch...")
-        result = subprocess.run(
-            ["git", "branch", "--show-current"],
-            capture_output=True,
-            text=True,
-            cwd=str(PROJECT_ROOT)
-        )
-        
-        if result.returncode != 0:
-            print(f"❌ Could not get current branch: {result.stderr}")
-            os.chdir(original_dir)
-            return False
-            
-        current_branch = result.stdout.strip()
-        if DEV_MODE:
-            print(f"📍 Current branch: {current_branch}")
-        
-        # Check if remote exists
-        if DEV_MODE:
-            print("🔍 Checking remote repository...")
-            result = subprocess.run(
-                ["git", "remote", "-v"],
-                capture_output=True,
-                text=True,
-                cwd=str(PROJECT_ROOT)
-            )
+        logger.debug("✅ Git commit successful")
+        if result.stdout:
+            logger.debug("   Commit output: %s", result.stdout)
             
-            if result.returncode == 0:
-                if result.stdout.strip():
-                    print(f"🌐 Remote repositories:\n{result.stdout}")
-                else:
-                    print("⚠️ No remote repositories configured")
-            else:
-                print(f"⚠️ Could not get remote info: {result.stderr}")
+        logger.debug("📍 Current branch: %s", current_branch)
+        if git_info["upstream"]:
+            logger.debug("🌐 Upstream branch: %s", git_info["upstream"])
+        else:
+            logger.debug("⚠️ No upstream branch configured")
         
         # Push to the current branch
         print(f"⬆️  Pushing to origin/{current_branch}...")
-        result = subprocess.run(
-            ["git", "push", "origin", current_branch],
-            capture_output=True,
-            text=True,
-            cwd=str(PROJECT_ROOT)
-        )
+        result = await _run_git(("git", "push", "origin", current_branch))
         
         # Always show output regardless of success/failure
-        if DEV_MODE:
-            print(f"📤 Push command completed with return code: {result.returncode}")
+        logger.debug("📤 Push command completed with return code: %s", result.returncode)
         
         if result.stdout:
             print(f"✅ Push stdout:\n{result.stdout}")
@@ -570,9 +1100,6 @@ async def execute_git_push():
         if result.stderr:
             print(f"📝 Push stderr:\n{result.stderr}")
         
-        # Restore original directory
-        os.chdir(original_dir)
-        
         if result.returncode == 0:
             print("🎉 Successfully pushed to GitHub!")
             print("🌐 Changes are now live on your repository")
@@ -584,67 +1111,145 @@ async def execute_git_push():
     except Exception as e:
         print(f"❌ Error during Git push: {e}")
         traceback.print_exc()
-        # Restore original directory in case of exception
-        try:
-            os.chdir(original_dir)
-        except:
-            pass
         return False
 
+# --- Shell lookup for the push script ---
+@functools.lru_cache(maxsize=1)
+def find_git_bash():
+    """Locate Git Bash (or any bash); resolved once per process."""
+    # Hardcoded known Git Bash locations
+    possible_paths = [
+        shutil.which("bash"),  # whatever's in PATH first
+        r"C:\Program Files\Git\bin\bash.exe",
+        r"C:\Program Files (x86)\Git\bin\bash.exe"
+    ]
+
+    logger.debug("🔍 Searching for Git Bash...")
+    for i, path in enumerate(possible_paths, 1):
+        logger.debug("   %d. Checking: %s", i, path)
+        if path and os.path.exists(path):
+            logger.debug("      ✅ EXISTS")
+            if "Git" in path:
+                logger.debug("      ✅ Contains 'Git' - SELECTED")
+                return path
+        else:
+            logger.debug("      ❌ NOT FOUND")
+
+    # Last resort: try any that exists
+    for path in possible_paths:
+        if path and os.path.exists(path):
+            logger.debug("   🔄 Fallback selection: %s", path)
+            return path
+    return None
+
+# --- In-process push (pygit2) ---
+if pygit2 is not None:
+    class _PushCallbacks(pygit2.RemoteCallbacks):
+        """Remote callbacks that turn a server-side ref rejection into a GitError.
+
+        Remote.push() returns normally when the remote refuses an update (e.g. a
+        protected branch or a pre-receive hook); the refusal only reaches this hook.
+        """
+
+        def push_update_reference(self, refname, message):
+            if message:
+                raise pygit2.GitError(f"{refname} rejected by remote: {message}")
+
+def _can_push_with_pygit2(repo, env) -> bool:
+    """True when the in-process push has what push_to_github.sh needs to authenticate."""
+    return repo is not None and all(env.get(var) for var in ("GITHUB_PAT", "GITHUB_USERNAME", "GIT_USER_EMAIL"))
+
+def _push_with_pygit2(repo, env) -> bool:
+    """Stage, commit and push the generated page with libgit2, mirroring push_to_github.sh."""
+    if not HTML_OUTPUT_FILE.exists():
+        print(f"❌ Error: No HTML file found at {HTML_OUTPUT_FILE}")
+        return False
+    if repo.head_is_detached:
+        print("❌ Error: HEAD is detached; check out a branch before pushing")
+        return False
+    html_path = HTML_OUTPUT_FILE.resolve().relative_to(PROJECT_ROOT).as_posix()
+    username = env["GITHUB_USERNAME"]
+
+    try:
+        # Point origin at the configured repository, as the script does
+        if env.get("GITHUB_REPO_URL"):
+            repo.remotes.set_url("origin", env["GITHUB_REPO_URL"])
+
+        print(f"📝 Adding {html_path} to staging...")
+        index = repo.index
+        index.read()
+        index.add(html_path)
+        index.write()
+        tree = index.write_tree()
+        if not repo.head_is_unborn and repo[repo.head.target].tree_id == tree:
+            print("ℹ️ No changes to commit")
+            return True
+
+        signature = pygit2.Signature(username, env["GIT_USER_EMAIL"])
+        parents = [] if repo.head_is_unborn else [repo.head.target]
+        commit_message = f"Auto-deploy: Updated web app - {time.strftime('%Y-%m-%d %H:%M:%S')}"
+        print("💾 Committing changes...")
+        repo.create_commit("HEAD", signature, signature, commit_message, tree, parents)
+
+        branch = repo.head.shorthand
+        print(f"⬆️  Pushing to branch: {branch}")
+        callbacks = _PushCallbacks(credentials=pygit2.UserPass(username, env["GITHUB_PAT"]))
+        repo.remotes["origin"].push([f"refs/heads/{branch}"], callbacks=callbacks)
+    except (pygit2.GitError, KeyError, ValueError) as e:
+        print(f"❌ Push failed: {e}")
+        return False
+    print("✅ Successfully pushed to GitHub!")
+    print("🌐 Changes are now live on your repository")
+    return True
+
+async def _echo_lines(stream, header: str) -> int:
+    """Print a subprocess stream line by line under `header`; return the characters read."""
+    total = 0
+    async for raw in stream:
+        line = raw.decode("utf-8", errors="replace")
+        if not total:
+            print(header)
+        total += len(line)
+        print(line.rstrip("\r\n"))
+    return total
+
 # --- Alternative function using the shell script ---
 async def execute_git_push_with_script():
-    """Execute Git push using the shell script in either allowed location."""
+    """Execute Git push with pygit2 when available, otherwise with the shell script."""
     try:
-        print("=" * 50)
-        print("🔍 DEBUG: Starting GitHub push process...")
-        print("=" * 50)
-        
-        # Check script availability
-        if PUSH_SCRIPT is None:
-            print(f"❌ No push_to_github.sh found in root or src/ui!")
-            print(f"📂 PROJECT_ROOT: {PROJECT_ROOT}")
-            print(f"📂 SCRIPT_IN_ROOT exists: {SCRIPT_IN_ROOT.exists() if SCRIPT_IN_ROOT else 'N/A'}")
-            print(f"📂 SCRIPT_IN_UI exists: {SCRIPT_IN_UI.exists() if SCRIPT_IN_UI else 'N/A'}")
-            return False
+        logger.debug("=" * 50)
+        logger.debug("🔍 DEBUG: Starting GitHub push process...")
+        logger.debug("=" * 50)
         
-        print(f"✅ Found push script: {PUSH_SCRIPT}")
+        # Snapshot the environment once instead of probing os.getenv per variable
+        env = dict(os.environ)
         
-        # Environment variable debugging
-        print("\n🔍 Environment Variables:")
-        env_vars = ['GITHUB_PAT', 'GITHUB_USERNAME', 'GITHUB_REPO_URL', 'PATH']
-        for var in env_vars:
-            value = os.getenv(var)
-            if var == 'GITHUB_PAT' and value:
-                print(f"🔐 {var}: {'*' * len(value[:4])}***{value[-4:] if len(value) > 8 else '***'} (masked)")
-            elif value:
-                print(f"📋 {var}: {value[:100]}{'...' if len(value) > 100 else ''}")
+        # Check if we're in Azure (common Azure environment variables)
+        azure_indicators = ('WEBSITE_SITE_NAME', 'WEBSITE_RESOURCE_GROUP', 'APPSETTING_WEBSITE_SITE_NAME')
+        in_azure = any(env.get(var) for var in azure_indicators)
+        
+        # Single pass: build the debug report and, in Azure, the list of missing variables
+        env_vars = ('GITHUB_PAT', 'GITHUB_USERNAME', 'GITHUB_REPO_URL', 'PATH')
+        azure_env_vars = (
+            'AZURE_OPENAI_API_KEY', 'AZURE_OPENAI_ENDPOINT', 'AZURE_OPENAI_DEPLOYMENT_NAME',
+            'GITHUB_PAT', 'GITHUB_USERNAME', 'GITHUB_REPO_URL', 'GIT_USER_EMAIL'
+        )
+        logger.debug("🔍 Environment Variables:")
+        missing_vars = []
+        for var in dict.fromkeys((env_vars + azure_env_vars) if in_azure else env_vars):
+            value = env.get(var)
+            if not value:
+                logger.debug("   ❌ %s: NOT SET", var)
+                if in_azure and var in azure_env_vars:
+                    missing_vars.append(var)
+            elif var == 'GITHUB_PAT' or var.endswith('_KEY'):
+                logger.debug("   🔐 %s: [PRESENT - masked]", var)
             else:
-                print(f"❌ {var}: NOT SET")
+                logger.debug("   📋 %s: %.100s%s", var, value, '...' if len(value) > 100 else '')
         
-        # Check if we're in Azure (common Azure environment variables)
-        azure_indicators = ['WEBSITE_SITE_NAME', 'WEBSITE_RESOURCE_GROUP', 'APPSETTING_WEBSITE_SITE_NAME']
-        in_azure = any(os.getenv(var) for var in azure_indicators)
-        print(f"\n🌐 Running in Azure: {in_azure}")
+        logger.debug("🌐 Running in Azure: %s", in_azure)
         if in_azure:
-            print("   Azure environment detected - using Azure-compatible Git operations")
-            
-            # Check for Azure App Service environment variables
-            azure_env_vars = [
-                'AZURE_OPENAI_API_KEY', 'AZURE_OPENAI_ENDPOINT', 'AZURE_OPENAI_DEPLOYMENT_NAME',
-                'GITHUB_PAT', 'GITHUB_USERNAME', 'GITHUB_REPO_URL', 'GIT_USER_EMAIL'
-            ]
-            print("\n🔍 Azure Environment Variables Check:")
-            missing_vars = []
-            for var in azure_env_vars:
-                value = os.getenv(var)
-                if value:
-                    if 'KEY' in var or 'PAT' in var:
-                        print(f"   ✅ {var}: [PRESENT - masked]")
-                    else:
-                        print(f"   ✅ {var}: {value}")
-                else:
-                    print(f"   ❌ {var}: MISSING")
-                    missing_vars.append(var)
+            logger.debug("   Azure environment detected - using Azure-compatible Git operations")
             
             if missing_vars:
                 print(f"\n⚠️ WARNING: Missing {len(missing_vars)} required environment variables in Azure:")
@@ -654,36 +1259,30 @@ async def execute_git_push_with_script():
                 print("   not just in the .env file (which only works locally).")
                 print("   Use Azure CLI: az webapp config appsettings set --name <app-name> --resource-group <rg> --settings VAR=value")
         else:
-            print("   Local environment detected - using .env file")
-
-        def find_git_bash():
-            # Hardcoded known Git Bash locations
-            possible_paths = [
-                shutil.which("bash"),  # whatever's in PATH first
-                r"C:\Program Files\Git\bin\bash.exe",
-                r"C:\Program Files (x86)\Git\bin\bash.exe"
-            ]
-            
-            print(f"\n🔍 Searching for Git Bash...")
-            for i, path in enumerate(possible_paths):
-                print(f"   {i+1}. Checking: {path}")
-                if path and os.path.exists(path):
-                    print(f"      ✅ EXISTS")
-                    if "Git" in path:
-                        print(f"      ✅ Contains 'Git' - SELECTED")
-                        return path
-                else:
-                    print(f"      ❌ NOT FOUND")
-            
-            # Last resort: try any that exists
-            for path in possible_paths:
-                if path and os.path.exists(path):
-                    print(f"   🔄 Fallback selection: {path}")
-                    return path
-            return None
+            logger.debug("   Local environment detected - using .env file")
+
+        # With pygit2 and the PAT credentials, commit and push in-process instead of starting
+        # a shell; otherwise libgit2 cannot reuse the system git credentials, so use the script
+        repo = _open_repository()
+        if _can_push_with_pygit2(repo, env):
+            print("\n🚀 Pushing with pygit2...")
+            success = await asyncio.to_thread(_push_with_pygit2, repo, env)
+            print(f"\n{'✅' if success else '❌'} GitHub push {'succeeded' if success else 'failed'}")
+            print("=" * 50)
+            return success
+
+        # Check script availability
+        if PUSH_SCRIPT is None:
+            print(f"❌ No push_to_github.sh found in root or src/ui!")
+            print(f"📂 PROJECT_ROOT: {PROJECT_ROOT}")
+            print(f"📂 SCRIPT_IN_ROOT exists: {SCRIPT_IN_ROOT.exists() if SCRIPT_IN_ROOT else 'N/A'}")
+            print(f"📂 SCRIPT_IN_UI exists: {SCRIPT_IN_UI.exists() if SCRIPT_IN_UI else 'N/A'}")
+            return False
+        
+        logger.debug("✅ Found push script: %s", PUSH_SCRIPT)
 
         git_bash = find_git_bash()
-        print(f"\n🔧 Git Bash resolved: {git_bash}")
+        logger.debug("🔧 Git Bash resolved: %s", git_bash)
         
         if not git_bash:
             print("❌ Could not find Git Bash! Trying alternative approaches...")
@@ -697,67 +1296,83 @@ async def execute_git_push_with_script():
                 print("❌ No shell executable found!")
                 return False
 
-        # Check script permissions and content
-        print(f"\n📋 Script Details:")
-        print(f"   Path: {PUSH_SCRIPT}")
-        print(f"   Exists: {PUSH_SCRIPT.exists()}")
-        print(f"   Size: {PUSH_SCRIPT.stat().st_size if PUSH_SCRIPT.exists() else 'N/A'} bytes")
-        print(f"   Readable: {os.access(PUSH_SCRIPT, os.R_OK) if PUSH_SCRIPT.exists() else 'N/A'}")
-        
-        # Show first few lines of script for debugging
-        if PUSH_SCRIPT.exists():
-            try:
-                with open(PUSH_SCRIPT, 'r', encoding='utf-8') as f:
-                    first_lines = [f.readline().strip() for _ in range(5)]
-                print(f"   First 5 lines:")
-                for i, line in enumerate(first_lines, 1):
-                    if line:
-                        print(f"      {i}: {line}")
-            except Exception as e:
-                print(f"   ❌ Could not read script: {e}")
+        # Check script permissions and content (debug only - skip the file reads otherwise)
+        # Disk access runs in a worker thread so it doesn't stall the event loop
+        if logger.isEnabledFor(logging.DEBUG):
+            script_exists = await asyncio.to_thread(PUSH_SCRIPT.exists)
+            logger.debug("📋 Script Details:")
+            logger.debug("   Path: %s", PUSH_SCRIPT)
+            logger.debug("   Exists: %s", script_exists)
+            if script_exists:
+                script_stat = await asyncio.to_thread(PUSH_SCRIPT.stat)
+                logger.debug("   Size: %s bytes", script_stat.st_size)
+                logger.debug("   Readable: %s", await asyncio.to_thread(os.access, PUSH_SCRIPT, os.R_OK))
+            
+            # Show first few lines of script for debugging
+            if script_exists:
+                try:
+                    first_lines = await asyncio.to_thread(
+                        lambda: PUSH_SCRIPT.read_text(encoding="utf-8", errors="replace").splitlines()[:5]
+                    )
+                    logger.debug("   First 5 lines:")
+                    for i, line in enumerate(first_lines, 1):
+                        line = line.strip()
+                        if line:
+                            logger.debug("      %d: %s", i, line)
+                except Exception as e:
+                    logger.debug("   ❌ Could not read script: %s", e)
 
         print(f"\n🚀 Executing push script...")
-        print(f"   Command: {git_bash} {PUSH_SCRIPT}")
-        print(f"   Working directory: {PUSH_SCRIPT.parent}")
-        
-        result = subprocess.run(
-            [git_bash, str(PUSH_SCRIPT)],
-            capture_output=True,
-            text=True,
+        logger.debug("   Command: %s %s", git_bash, PUSH_SCRIPT)
+        logger.debug("   Working directory: %s", PUSH_SCRIPT.parent)
+        
+        # Run the script as an asyncio subprocess so the event loop keeps serving other tasks
+        proc = await asyncio.create_subprocess_exec(
+            git_bash, str(PUSH_SCRIPT),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
             cwd=str(PUSH_SCRIPT.parent),
-            encoding="utf-8",
-            errors="replace",
-            timeout=300  # 5 minute timeout
         )
+        try:
+            # Print output as the script produces it instead of buffering it all
+            stdout_len, stderr_len, _ = await asyncio.wait_for(
+                asyncio.gather(
+                    _echo_lines(proc.stdout, "\n📝 Script Output:"),
+                    _echo_lines(proc.stderr, "\n⚠️ Script Errors:"),
+                    proc.wait(),
+                ),
+                timeout=300,  # 5 minute timeout
+            )
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            print("❌ Script execution timed out (5 minutes)")
+            return False
 
-        print(f"\n📤 Script execution completed:")
-        print(f"   Return code: {result.returncode}")
-        print(f"   Stdout length: {len(result.stdout)} chars")
-        print(f"   Stderr length: {len(result.stderr)} chars")
-        
-        if result.stdout:
-            print(f"\n📝 Script Output:")
-            print(result.stdout)
-        if result.stderr:
-            print(f"\n⚠️ Script Errors:")
-            print(result.stderr)
+        logger.debug("📤 Script execution completed:")
+        logger.debug("   Return code: %s", proc.returncode)
+        logger.debug("   Stdout length: %d chars", stdout_len)
+        logger.debug("   Stderr length: %d chars", stderr_len)
 
-        success = result.returncode == 0
+        success = proc.returncode == 0
         print(f"\n{'✅' if success else '❌'} GitHub push {'succeeded' if success else 'failed'}")
         print("=" * 50)
         
         return success
         
-    except subprocess.TimeoutExpired:
-        print("❌ Script execution timed out (5 minutes)")
-        return False
     except Exception as e:
         print(f"❌ Exception during script execution: {e}")
         traceback.print_exc()
         return False
 
     # Enhanced Multi-Agent Workflow ---
-async def run_multi_agent(user_input: str, streamlit_mode=False):
+async def stream_multi_agent(user_input: str, streamlit_mode=False, history_policy=HISTORY_POLICY):
+    """Run the workflow, yielding events as they happen.
+
+    Each agent message is yielded as {"type": "message", "role", "content"} as
+    soon as it arrives; the last event is {"type": "result", "result": ...}
+    carrying what run_multi_agent returns.
+    """
     print("=" * 60)
     print("🚀 MULTI-AGENT WEB DEVELOPMENT WORKFLOW")
     print("=" * 60)
@@ -773,21 +1388,38 @@ async def run_multi_agent(user_input: str, streamlit_mode=False):
         "error_message": ""
     }
     
-    # Kernel and services
+    # Kernel and services - the real-time service is registered first so it is the
+    # kernel default; the selection prompt and history summaries always use it
+    chat_service = get_chat_service(AzureChatCompletion)
     kernel = Kernel()
-    kernel.add_service(
-        AzureChatCompletion(
-            deployment_name=os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT_NAME"),
-            endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-        )
-    )
+    kernel.add_service(chat_service)
+
+    # Only agent turns go through the Batch API; the interactive terminal flow stays real-time
+    agent_arguments = None
+    if USE_BATCH_API and streamlit_mode:
+        kernel.add_service(get_chat_service(BatchAzureChatCompletion, service_id=_BATCH_SERVICE_ID))
+        agent_arguments = KernelArguments(settings=OpenAIChatPromptExecutionSettings(service_id=_BATCH_SERVICE_ID))
+
+    # Older turns are summarized by a cheaper deployment when one is configured
+    summary_service = chat_service
+    if history_policy == "window_summary" and _AZ_SUMMARY_DEPLOY:
+        summary_service = get_chat_service(AzureChatCompletion, _AZ_SUMMARY_DEPLOY)
+    # The agents share one group-chat channel, so they share one reducer too
+    history_reducer = create_history_reducer(summary_service, history_policy)
     
-    business_analyst = create_business_analyst(kernel)
-    software_engineer = create_software_engineer(kernel)
-    product_owner = create_product_owner(kernel)
-    selection_strategy = create_agent_selection_strategy(kernel)
+    # Shared values for the persona templates (none are required today)
+    persona_context = {}
+    
+    # Agents and selection strategy are independent - build them concurrently
+    business_analyst, software_engineer, product_owner, selection_strategy = await asyncio.gather(
+        create_business_analyst(kernel, history_reducer, persona_context, agent_arguments),
+        create_software_engineer(kernel, history_reducer, persona_context, agent_arguments),
+        create_product_owner(kernel, history_reducer, persona_context, agent_arguments),
+        create_agent_selection_strategy(kernel),
+    )
+    if not STRICT_MODE:
+        # Obvious transitions are decided by rules; the LLM only handles the rest
+        selection_strategy = DeterministicSelectionStrategy(fallback=selection_strategy)
     termination_strategy = ApprovalTerminationStrategy()
     
     chat = AgentGroupChat(
@@ -805,12 +1437,16 @@ async def run_multi_agent(user_input: str, streamlit_mode=False):
     
     # Print agent messages as required
     message_count = 0
-    last_agent_name = None
-    business_analyst_questions = 0
     ready_for_user_approval = False
     ba_asked = False
-
-    async for content in chat.invoke():
+    engineer_outputs: List[str] = []  # raw SoftwareEngineer replies; HTML is extracted once when persisting
+    echo_messages = VERBOSE or not streamlit_mode
+    # The user request plus every message the loop consumed; turns the pump
+    # prefetched past a break are left out
+    consumed_messages: List[ChatMessageContent] = [initial_message]
+
+    # The selection strategy builds its own prompt input, so the chat can run one turn ahead
+    async for content in buffered(chat.invoke()):
         agent_name = getattr(content, 'name', 'Unknown')
 
         # Skip repeated BusinessAnalyst messages (logic kept from your version)
@@ -825,123 +1461,92 @@ async def run_multi_agent(user_input: str, streamlit_mode=False):
             ba_asked = False
 
         message_count += 1
-        last_agent_name = agent_name
+        consumed_messages.append(content)
 
         # Track speaker transitions
-        if agent_name == "BusinessAnalyst":
-            business_analyst_questions += 1
+        if agent_name == "SoftwareEngineer" and content.content:
+            engineer_outputs.append(content.content)
 
-        print(f"# {content.role} - {content.name or '*'}: '{content.content}'")
-        print("-" * 60)
+        # Terminal mode shows the transcript; Streamlit renders it from the returned messages
+        if echo_messages:
+            print(f"# {content.role} - {content.name or '*'}: '{content.content}'")
+            print("-" * 60)
+        yield {"type": "message", "role": content.name or content.role.value, "content": content.content or ""}
 
-        print(f"📊 Messages: {message_count}")
-        print(f"✅ Last agent: {agent_name}")
-        print(f"⌛ Processing...\n")
+        logger.debug("📊 Messages: %d", message_count)
+        logger.debug("✅ Last agent: %s", agent_name)
+        logger.debug("⌛ Processing...")
 
         # Check for ProductOwner approval - use simple logic from old working file
-        if agent_name == "ProductOwner" and "READY FOR USER APPROVAL" in content.content.upper():
+        if agent_name == "ProductOwner" and content.content and _APPROVAL_RE.search(content.content):
             ready_for_user_approval = True
             workflow_status["approval_ready"] = True
             print("🎯 READY FOR USER APPROVAL detected!")
             break
 
-        # Enhanced chat history for selection strategy
-        history_for_selection = []
-        for i, msg in enumerate(chat.history[-8:]):  # Last 8 messages
-            speaker = "User" if (hasattr(msg, 'role') and msg.role == AuthorRole.USER) else getattr(msg, 'name', 'Unknown')
-            history_for_selection.append(f"{speaker}: {msg.content[:200]}...")  # Truncate long messages
-        context_info = f"\nContext: BusinessAnalyst has asked {business_analyst_questions} questions. Last speaker: {agent_name}"
-        selection_strategy.arguments = KernelArguments(
-            chat_history="\n".join(history_for_selection) + context_info
-        )
-
-        # Safety checks
+        # Safety check (BusinessAnalyst overruns are prevented by the selection strategy)
         if message_count > 20:
             print("⚠️ Safety limit reached. Ending conversation.")
             workflow_status["safety_limit_reached"] = True
             break
-        if agent_name == "BusinessAnalyst" and business_analyst_questions > 2:
-            print("⚠️ BusinessAnalyst asked too many questions. Moving to development.")
-            completion_msg = ChatMessageContent(
-                role=AuthorRole.ASSISTANT,
-                content="Requirements are clear based on the initial request. Ready for development."
-            )
-            completion_msg.name = "BusinessAnalyst"
-            await chat.add_chat_message(completion_msg)
-            ba_asked = False  # Reset the flag
-
-        last_speaker = agent_name
 
-    # Check for approval (if ProductOwner's last message contains it)
-    approval_in_history = any(
-        getattr(m, "name", None) == "ProductOwner" and m.content and "READY FOR USER APPROVAL" in m.content.upper()
-        for m in chat.history[-5:]
-    )
-    
-    # Update workflow status
-    if approval_in_history:
-        workflow_status["approval_ready"] = True
+    # Update workflow status (approval was detected in-loop, no history re-scan needed)
+    if ready_for_user_approval:
         workflow_status["completed"] = True
     
     # Collect all chat messages (for Streamlit) before returning
-    streamlit_messages = []
-    for m in chat.history:
-        streamlit_messages.append({
-            "role": getattr(m, 'name', getattr(m, 'role', 'assistant')),
-            "content": getattr(m, 'content', str(m))
-        })
+    streamlit_messages = [
+        {"role": m.name or m.role.value, "content": m.content or ""}
+        for m in consumed_messages
+    ]
     
     # Handle safety limit reached scenario
     if workflow_status["safety_limit_reached"]:
         print("⚠️ Workflow stopped due to safety limit (20 messages)")
         if streamlit_mode:
-            return {
+            yield {"type": "result", "result": {
                 "messages": streamlit_messages,
                 "status": "safety_limit_reached",
                 "error_message": "The conversation exceeded the safety limit of 20 messages. This usually happens when the agents get stuck in a loop or have unclear requirements."
-            }
+            }}
+            return
         else:
             print("❌ The workflow exceeded the safety limit. Please try with clearer requirements.")
-            return streamlit_messages
+            yield {"type": "result", "result": streamlit_messages}
+            return
     
     # Handle normal approval flow
     
-    if approval_in_history:
+    if ready_for_user_approval:
         print("🎯 ProductOwner says project is ready!")
         
         # Handle different modes: terminal vs Streamlit
         if streamlit_mode:
             # For Streamlit: Return special state indicating approval is needed
-            return {
+            yield {"type": "result", "result": {
                 "messages": streamlit_messages,
                 "status": "awaiting_approval",
-                "chat_history": chat.history
-            }
+                "chat_history": chat.history,
+                "chat_views": termination_strategy.views,
+            }}
+            return
         else:
             # For terminal: Use input() as before - REQUIREMENT: User must type "APPROVED"
             print("🔐 SECURITY CHECK - User Approval Required!")
             print("Type 'APPROVED' to finalize and push to GitHub, or anything else to exit:")
-            user_approval = input().strip()
+            user_approval = (await asyncio.to_thread(input)).strip()
             if user_approval.upper() == "APPROVED":
                 print("✅ User typed 'APPROVED' - proceeding with deployment...")
-                # Extract HTML code from SoftwareEngineer messages
-                html_code = None
-                for message in chat.history:
-                    if getattr(message, 'name', None) == "SoftwareEngineer":
-                        extracted_html = _extract_html(message.content)
-                        if extracted_html and len(extracted_html) > 50:
-                            html_code = extracted_html
-                            break
+                # HTML from the latest SoftwareEngineer reply, captured during the chat
+                html_code = _latest_engineer_html(engineer_outputs)
                 if html_code:
-                    HTML_OUTPUT_FILE.write_text(html_code, encoding="utf-8")
+                    await asyncio.to_thread(HTML_OUTPUT_FILE.write_text, html_code, encoding="utf-8")
                     print(f"💾 Saved HTML to: {HTML_OUTPUT_FILE.resolve()}")
                     # User already approved with "APPROVED", so push automatically
                     push_success = await execute_git_push_with_script()
                     
                     # Generate GitHub URLs: Pages URL (for live app), file URL (for source code), and raw URL (for download)
-                    github_pages_url = generate_github_pages_url("index.html", "main")
-                    github_file_url = generate_github_file_url("index.html", "main")
-                    github_raw_url = generate_github_raw_url("index.html", "main")
+                    github_pages_url, github_file_url, github_raw_url = await generate_github_urls("index.html", "main")
                     print("=" * 60)
                     print("🎉 WEB APP DEPLOYMENT COMPLETED!")
                     print("=" * 60)
@@ -952,7 +1557,7 @@ async def run_multi_agent(user_input: str, streamlit_mode=False):
                             print("   (Note: GitHub Pages may take a few minutes to activate if this is your first deployment)")
                         print(f"📄 View source code: {github_file_url}")
                         print(f"⬇️ Direct download: {github_raw_url}")
-                        print(f"📂 GitHub Repository: {os.getenv('GITHUB_REPO_URL', '')}")
+                        print(f"📂 GitHub Repository: {GITHUB_REPO_URL}")
                     else:
                         print(f"📁 Local file saved: {HTML_OUTPUT_FILE.resolve()}")
                         
@@ -966,41 +1571,41 @@ async def run_multi_agent(user_input: str, streamlit_mode=False):
     else:
         print("❌ The Product Owner did NOT approve. Workflow incomplete.")
         if streamlit_mode:
-            return {
+            yield {"type": "result", "result": {
                 "messages": streamlit_messages,
                 "status": "incomplete",
                 "error_message": "The ProductOwner did not approve the solution. The agents may need clearer requirements or the task may be too complex."
-            }
+            }}
+            return
             
     print("=" * 60)
     print("🎉 MULTI-AGENT WORKFLOW COMPLETED")
     print("=" * 60)
 
     # Return messages for terminal mode
-    return streamlit_messages
+    yield {"type": "result", "result": streamlit_messages}
 
-    # Collect all chat messages (for Streamlit) before returning
-    streamlit_messages = []
-    for m in chat.history:
-        streamlit_messages.append({
-            "role": getattr(m, 'name', getattr(m, 'role', 'assistant')),
-            "content": getattr(m, 'content', str(m))
-        })
-    return streamlit_messages
+async def run_multi_agent(user_input: str, streamlit_mode=False, history_policy=HISTORY_POLICY):
+    """Run the workflow to completion and return its result."""
+    result = None
+    async for event in stream_multi_agent(user_input, streamlit_mode, history_policy):
+        if event["type"] == "result":
+            result = event["result"]
+    return result
 
-async def handle_approval(chat_history, user_decision="APPROVED"):
+async def handle_approval(chat_history, user_decision="APPROVED", views=None):
     """Handle the approval process after user explicitly types 'APPROVED'."""
     try:
-        print("=" * 60)
-        print("🔍 DEBUG: Starting approval process...")
-        print("=" * 60)
+        logger.debug("=" * 60)
+        logger.debug("🔍 DEBUG: Starting approval process...")
+        logger.debug("=" * 60)
         
         # Fix NoneType error - ensure user_decision is not None
         if user_decision is None:
             user_decision = "APPROVED"
         
-        print(f"📋 User decision: '{user_decision}'")
-        print(f"📋 Chat history length: {len(chat_history) if chat_history else 0}")
+        logger.debug("📋 User decision: '%s'", user_decision)
+        logger.debug("📋 Chat history length: %d", len(chat_history) if chat_history else 0)
         
         # SECURITY CHECK: Must be exactly "APPROVED"
         if user_decision.upper() != "APPROVED":
@@ -1012,20 +1617,33 @@ async def handle_approval(chat_history, user_decision="APPROVED"):
         
         # Extract HTML code from SoftwareEngineer messages
         html_code = None
-        print("\n🔍 Searching for HTML code in chat history...")
-        
-        for i, message in enumerate(chat_history):
-            message_name = getattr(message, 'name', 'Unknown')
-            message_content = getattr(message, 'content', '')
-            print(f"   Message {i+1}: {message_name} ({len(message_content)} chars)")
-            
-            if message_name == "SoftwareEngineer":
-                extracted_html = _extract_html(message_content)
-                print(f"      Extracted HTML: {len(extracted_html) if extracted_html else 0} chars")
+        logger.debug("🔍 Searching for HTML code in chat history...")
+        
+        messages = list(chat_history)
+        # The termination strategy already indexed the latest SoftwareEngineer reply
+        if views is not None and 0 <= views.last_se_idx < len(messages):
+            latest = messages[views.last_se_idx].content or ""
+            if "```" in latest:
+                extracted_html = _extract_html(latest)
                 if extracted_html and len(extracted_html) > 50:
                     html_code = extracted_html
-                    print(f"      ✅ Valid HTML found! Length: {len(html_code)}")
-                    break
+                    logger.debug("      ✅ Valid HTML found at message %d", views.last_se_idx + 1)
+
+        if not html_code:
+            # Fall back to scanning, newest first: the latest SoftwareEngineer code is the version ProductOwner approved
+            for i in range(len(messages) - 1, -1, -1):
+                message = messages[i]
+                message_name = getattr(message, 'name', 'Unknown')
+                message_content = getattr(message, 'content', '')
+                logger.debug("   Message %d: %s (%d chars)", i + 1, message_name, len(message_content))
+            
+                if message_name == "SoftwareEngineer" and "```" in message_content:
+                    extracted_html = _extract_html(message_content)
+                    logger.debug("      Extracted HTML: %d chars", len(extracted_html) if extracted_html else 0)
+                    if extracted_html and len(extracted_html) > 50:
+                        html_code = extracted_html
+                        logger.debug("      ✅ Valid HTML found! Length: %d", len(html_code))
+                        break
                     
         if not html_code:
             print("❌ No valid HTML code found in chat history")
@@ -1035,7 +1653,7 @@ async def handle_approval(chat_history, user_decision="APPROVED"):
         
         # Always save HTML locally first
         try:
-            HTML_OUTPUT_FILE.write_text(html_code, encoding="utf-8")
+            await asyncio.to_thread(HTML_OUTPUT_FILE.write_text, html_code, encoding="utf-8")
             print(f"✅ HTML saved successfully ({len(html_code)} characters)")
         except Exception as e:
             print(f"❌ Failed to save HTML locally: {e}")
@@ -1046,14 +1664,12 @@ async def handle_approval(chat_history, user_decision="APPROVED"):
         print(f"📤 GitHub push result: {'SUCCESS' if push_success else 'FAILED'}")
         
         # Generate GitHub URLs: Pages URL (for live app), file URL (for source code), and raw URL (for download)
-        print("\n🔗 Generating GitHub URLs...")
-        github_pages_url = generate_github_pages_url("index.html", "main")
-        github_file_url = generate_github_file_url("index.html", "main")
-        github_raw_url = generate_github_raw_url("index.html", "main")
+        logger.debug("🔗 Generating GitHub URLs...")
+        github_pages_url, github_file_url, github_raw_url = await generate_github_urls("index.html", "main")
         
-        print(f"   Pages URL: {github_pages_url}")
-        print(f"   File URL: {github_file_url}")
-        print(f"   Raw URL: {github_raw_url}")
+        logger.debug("   Pages URL: %s", github_pages_url)
+        logger.debug("   File URL: %s", github_file_url)
+        logger.debug("   Raw URL: %s", github_raw_url)
         
         # Show results in terminal
         print("=" * 60)
@@ -1066,7 +1682,7 @@ async def handle_approval(chat_history, user_decision="APPROVED"):
                 print("   (Note: GitHub Pages may take a few minutes to activate if this is your first deployment)")
             print(f"📄 View source code: {github_file_url}")
             print(f"⬇️ Direct download: {github_raw_url}")
-            print(f"📂 GitHub Repository: {os.getenv('GITHUB_REPO_URL', '')}")
+            print(f"📂 GitHub Repository: {GITHUB_REPO_URL}")
         else:
             print(f"📁 Local file saved: {HTML_OUTPUT_FILE.resolve()}")
             
@@ -1084,7 +1700,7 @@ async def handle_approval(chat_history, user_decision="APPROVED"):
             result_message += f"📁 Local file: {HTML_OUTPUT_FILE.resolve()}\n"
         result_message += f"📊 File size: {len(html_code)} characters"
         
-        print(f"\n📋 Returning result message ({len(result_message)} chars)")
+        logger.debug("📋 Returning result message (%d chars)", len(result_message))
         print("✅ Approval process completed successfully")
         
         return html_code, result_message
@@ -1103,9 +1719,9 @@ async def main():
         print("=" * 50)
         
         # Run diagnostic first
-        diagnose_git_setup()
+        await diagnose_git_setup()
         
-        user_request = input("\nWhat would you like to build? ")
+        user_request = await asyncio.to_thread(input, "\nWhat would you like to build? ")
         
         if not user_request.strip():
             print("❌ No request provided. Exiting...")
@@ -1120,7 +1736,7 @@ async def main():
         traceback.print_exc()
     finally:
         print("🔄 Cleaning up resources...")
-        await asyncio.sleep(0.1)
+        await close_http_client()
 
 # --- Streamlit Interface ---
 def create_streamlit_interface():
@@ -1128,6 +1744,10 @@ def create_streamlit_interface():
     try:
         import streamlit as st
         
+        # Use the process-wide loop app.py also runs on; when this file is the Streamlit
+        # script it re-executes on every rerun, so Streamlit's resource cache keeps the first one
+        loop = st.cache_resource(get_background_loop)()
+        
         st.title("🤖 Multi-Agent Web Development System")
         st.markdown("---")
         
@@ -1146,7 +1766,7 @@ def create_streamlit_interface():
             if st.button("🚀 Start Development") and user_request.strip():
                 with st.spinner("Running multi-agent workflow..."):
                     # Run the workflow in Streamlit mode
-                    result = asyncio.run(run_multi_agent(user_request, streamlit_mode=True))
+                    result = run_coroutine(run_multi_agent(user_request, streamlit_mode=True), loop)
                     st.session_state.chat_result = result
                     
                     if isinstance(result, dict) and result.get("status") == "awaiting_approval":
@@ -1187,7 +1807,7 @@ def create_streamlit_interface():
                     if user_approval.strip().upper() == "APPROVED":
                         with st.spinner("Deploying to GitHub..."):
                             chat_history = st.session_state.chat_result.get("chat_history", [])
-                            html_code, result_message = asyncio.run(handle_approval(chat_history, "APPROVED"))
+                            html_code, result_message = run_coroutine(handle_approval(chat_history, "APPROVED"), loop)
                             st.session_state.final_result = result_message
                             st.session_state.awaiting_approval = False
                             st.rerun()
@@ -1227,6 +1847,7 @@ if __name__ == "__main__" and "streamlit" in sys.modules:
     run_streamlit_app()
 elif __name__ == "__main__":
     # Terminal mode
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     if os.name == 'nt':
         try:
             asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())